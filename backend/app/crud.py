@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 from typing import Sequence
 
-from sqlalchemy import Select, delete, func, select
+from sqlalchemy import case, delete, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import Transaction, User
@@ -11,10 +11,9 @@ from .models import Transaction, User
 
 # Users
 async def create_user(session: AsyncSession, name: str, email: str) -> User:
-	user = User(name=name, email=email)
-	session.add(user)
+	stmt = insert(User).values(name=name, email=email).returning(User)
+	user = (await session.execute(stmt)).scalar_one()
 	await session.commit()
-	await session.refresh(user)
 	return user
 
 
@@ -41,7 +40,7 @@ async def create_transaction(
 	shares: float | None,
 	price_at_trade: float | None,
 ) -> Transaction:
-	txn = Transaction(
+	stmt = insert(Transaction).values(
 		user_id=user_id,
 		date=date_,
 		type=type_,
@@ -50,20 +49,52 @@ async def create_transaction(
 		asset_symbol=asset_symbol,
 		shares=shares,
 		price_at_trade=price_at_trade,
-	)
-	session.add(txn)
+	).returning(Transaction)
+	txn = (await session.execute(stmt)).scalar_one()
 	await session.commit()
-	await session.refresh(txn)
 	return txn
 
 
-async def list_transactions(session: AsyncSession, user_id: int | None = None) -> Sequence[Transaction]:
-	stmt: Select[tuple[Transaction]] = select(Transaction)
+async def create_transactions_bulk(session: AsyncSession, rows: list[dict]) -> list[Transaction]:
+	"""Insert many transactions in one transaction/commit."""
+	txns = [Transaction(**row) for row in rows]
+	session.add_all(txns)
+	await session.commit()
+	return txns
+
+
+async def list_transactions(session: AsyncSession, user_id: int | None = None) -> list[dict]:
+	"""Stream plain column rows in chunks; skips per-row ORM object construction."""
+	stmt = select(
+		Transaction.id,
+		Transaction.user_id,
+		Transaction.date,
+		Transaction.type,
+		Transaction.category,
+		Transaction.amount,
+		Transaction.asset_symbol,
+		Transaction.shares,
+		Transaction.price_at_trade,
+	)
 	if user_id is not None:
 		stmt = stmt.where(Transaction.user_id == user_id)
 	stmt = stmt.order_by(Transaction.date, Transaction.id)
-	result = await session.execute(stmt)
-	return result.scalars().all()
+	result = await session.stream(stmt.execution_options(yield_per=500))
+	return [dict(row._mapping) async for row in result]
+
+
+async def get_monthly_cashflow(session: AsyncSession, user_id: int) -> Sequence[tuple]:
+	"""Sum income/expense amounts per (year, month) directly in SQL."""
+	year = func.strftime("%Y", Transaction.date).label("y")
+	month = func.strftime("%m", Transaction.date).label("m")
+	stmt = (
+		select(year, month, Transaction.type, func.sum(Transaction.amount))
+		.where(Transaction.user_id == user_id)
+		.where(Transaction.type.in_(("income", "expense")))
+		.group_by(year, month, Transaction.type)
+		.order_by(year, month)
+	)
+	return (await session.execute(stmt)).all()
 
 
 async def get_positions(session: AsyncSession, user_id: int) -> dict[str, float]:
@@ -80,16 +111,22 @@ async def get_positions(session: AsyncSession, user_id: int) -> dict[str, float]
 
 
 async def get_cash_balance(session: AsyncSession, user_id: int) -> float:
-	income_stmt = (
-		select(func.sum(Transaction.amount))
-		.where(Transaction.user_id == user_id)
-		.where(Transaction.type == "income")
-	)
-	expense_stmt = (
-		select(func.sum(Transaction.amount))
+	stmt = (
+		select(
+			func.sum(case((Transaction.type == "income", Transaction.amount), else_=0)),
+			func.sum(case((Transaction.type == "expense", Transaction.amount), else_=0)),
+		)
 		.where(Transaction.user_id == user_id)
-		.where(Transaction.type == "expense")
 	)
-	income = (await session.execute(income_stmt)).scalar() or 0.0
-	expense = (await session.execute(expense_stmt)).scalar() or 0.0
-	return float(income) - float(expense)
+	income, expense = (await session.execute(stmt)).one()
+	return float(income or 0.0) - float(expense or 0.0)
+
+
+async def get_user_state(session: AsyncSession, user_id: int) -> tuple[dict[str, float], float]:
+	"""Positions and cash for a user, cached on the session for the request."""
+	cache = session.info.setdefault("user_state", {})
+	if user_id not in cache:
+		positions = await get_positions(session, user_id)
+		cash = await get_cash_balance(session, user_id)
+		cache[user_id] = (positions, cash)
+	return cache[user_id]
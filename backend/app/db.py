@@ -3,8 +3,10 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 DATABASE_URL = "sqlite+aiosqlite:///./finance.db"
 
@@ -13,12 +15,32 @@ class Base(DeclarativeBase):
 	pass
 
 
+# Pool sized for the dashboard's parallel analytics requests; WAL (below)
+# lets these connections read concurrently.
 engine = create_async_engine(
 	DATABASE_URL,
 	echo=False,
 	future=True,
+	poolclass=AsyncAdaptedQueuePool,
+	pool_size=20,
+	max_overflow=10,
+	pool_pre_ping=True,
+	pool_recycle=1800,
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):  # type: ignore[no-untyped-def]
+	# WAL lets readers run alongside a writer; synchronous=NORMAL drops
+	# the fsync-per-commit cost that WAL makes safe to skip.
+	cursor = dbapi_connection.cursor()
+	cursor.execute("PRAGMA journal_mode=WAL")
+	cursor.execute("PRAGMA synchronous=NORMAL")
+	cursor.execute("PRAGMA temp_store=MEMORY")
+	cursor.execute("PRAGMA cache_size=-65536")
+	cursor.execute("PRAGMA mmap_size=268435456")
+	cursor.close()
+
 AsyncSessionLocal = async_sessionmaker(
 	bind=engine,
 	expire_on_commit=False,
@@ -35,9 +57,11 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 @asynccontextmanager
 async def lifespan(app):  # type: ignore[no-untyped-def]
 	# Import models here to ensure metadata is available
-	from . import models  # noqa: F401
+	from . import market, models  # noqa: F401
 
 	async with engine.begin() as conn:
 		await conn.run_sync(models.Base.metadata.create_all)
+	market.get_http_client()
 	yield
 	# No teardown needed for SQLite
+	await market.close_http_client()
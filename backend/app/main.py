@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import date, timedelta
 from typing import List
 
+import asyncio
 import math
 import random
+import time
+
+import numpy as np
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import crud, schemas
-from .db import get_session, lifespan
+from .db import AsyncSessionLocal, get_session, lifespan
 from .market import get_last_prices, get_price_history
 
 app = FastAPI(lifespan=lifespan, title="Full-Stack Finance API", version="0.1.0")
@@ -53,64 +58,64 @@ async def get_transactions(user_id: int | None = None, session: AsyncSession = D
 	return await crud.list_transactions(session, user_id)
 
 
-# Helpers
+# Analytics
 
-def date_range(start: date, end: date) -> List[date]:
-	res: List[date] = []
-	cur = start
-	while cur <= end:
-		res.append(cur)
-		cur = cur + timedelta(days=1)
-	return res
- 
+# Recent portfolio-value series keyed by user/date/holdings so dashboard
+# tabs hitting both /api/portfolio/value and /api/networth share the work.
+_PV_CACHE: dict[tuple, tuple[float, list[dict]]] = {}
+_PV_CACHE_TTL = 60.0
 
-# Analytics
-@app.get("/api/portfolio/value", response_model=List[schemas.PortfolioValuePoint], tags=["Analytics"], summary="Portfolio Value")
-async def portfolio_value(user_id: int, as_of: date | None = None, session: AsyncSession = Depends(get_session)):
-	as_of = as_of or date.today()
-	positions = await crud.get_positions(session, user_id)
-	cash = await crud.get_cash_balance(session, user_id)
+
+async def _compute_portfolio_value(session: AsyncSession, user_id: int, as_of: date) -> list[dict]:
+	positions, cash = await crud.get_user_state(session, user_id)
 	if not positions:
 		return [{"date": as_of, "value": float(cash)}]
+	key = (user_id, as_of, float(cash), tuple(sorted(positions.items())))
+	cached = _PV_CACHE.get(key)
+	if cached is not None and time.time() - cached[0] < _PV_CACHE_TTL:
+		return cached[1]
 	symbols = list(positions.keys())
 	start = as_of - timedelta(days=365)
 	history = await get_price_history(symbols, start, as_of)
-	points: list[schemas.PortfolioValuePoint] = []
-	for d in date_range(start, as_of):
-		total = cash
-		for sym, shares in positions.items():
-			series = history.get(sym, [])
-			# find last price at or before d
-			price = 0.0
-			for row in reversed(series):
-				if row["date"] <= d:
-					price = float(row["close"])
-					break
-			total += shares * price
-		points.append({"date": d, "value": float(total)})
+	# Forward-fill each symbol's closes onto the full daily range: the
+	# index of the last row at or before each day comes from one
+	# searchsorted over the sorted history.
+	days = np.arange(np.datetime64(start), np.datetime64(as_of) + np.timedelta64(1, "D"), dtype="datetime64[D]")
+	values = np.full(days.shape, float(cash))
+	for sym in symbols:
+		series = history.get(sym, [])
+		if not series:
+			continue
+		dates_arr = np.array([r["date"] for r in series], dtype="datetime64[D]")
+		closes = np.array([r["close"] for r in series], dtype="float64")
+		idxs = np.searchsorted(dates_arr, days, side="right") - 1
+		prices = np.where(idxs >= 0, closes[np.maximum(idxs, 0)], 0.0)
+		values += positions[sym] * prices
+	points = [{"date": d, "value": float(v)} for d, v in zip(days.tolist(), values)]
+	now = time.time()
+	# Evict expired entries on insert; keys embed cash/holdings, so stale
+	# ones are never overwritten and would otherwise accumulate forever.
+	for k in [k for k, (ts, _) in _PV_CACHE.items() if now - ts >= _PV_CACHE_TTL]:
+		del _PV_CACHE[k]
+	_PV_CACHE[key] = (now, points)
 	return points
 
 
-@app.get("/api/cashflow", response_model=List[schemas.CashflowPoint], tags=["Analytics"], summary="Cashflow")
-async def cashflow(user_id: int, session: AsyncSession = Depends(get_session)):
-	txns = await crud.list_transactions(session, user_id)
-	if not txns:
+@app.get("/api/portfolio/value", response_model=List[schemas.PortfolioValuePoint], tags=["Analytics"], summary="Portfolio Value")
+async def portfolio_value(user_id: int, as_of: date | None = None, session: AsyncSession = Depends(get_session)):
+	return await _compute_portfolio_value(session, user_id, as_of or date.today())
+
+
+async def _compute_cashflow(session: AsyncSession, user_id: int) -> list[dict]:
+	rows = await crud.get_monthly_cashflow(session, user_id)
+	if not rows:
 		return []
-	monthly: dict[tuple[int, int], dict[str, float]] = {}
-	for t in txns:
-		if t.type not in ("income", "expense"):
-			continue
-		key = (t.date.year, t.date.month)
-		if key not in monthly:
-			monthly[key] = {"income": 0.0, "expense": 0.0}
-		if t.type == "income":
-			monthly[key]["income"] += float(t.amount)
-		else:
-			monthly[key]["expense"] += float(t.amount)
-	points: list[schemas.CashflowPoint] = []
+	monthly: defaultdict[tuple[int, int], list[float]] = defaultdict(lambda: [0.0, 0.0])
+	for y, m, type_, total in rows:
+		monthly[(int(y), int(m))][0 if type_ == "income" else 1] = float(total or 0.0)
+	points: list[dict] = []
 	for (y, m) in sorted(monthly.keys()):
-		income = monthly[(y, m)]["income"]
-		expense = monthly[(y, m)]["expense"]
+		income, expense = monthly[(y, m)]
 		points.append({
 			"date": date(y, m, 1),
 			"income": float(income),
@@ -120,11 +125,13 @@ async def cashflow(user_id: int, session: AsyncSession = Depends(get_session)):
 	return points
 
 
-@app.get("/api/allocation", response_model=List[schemas.AllocationSlice], tags=["Analytics"], summary="Allocation")
-async def allocation(user_id: int, as_of: date | None = None, session: AsyncSession = Depends(get_session)):
-	as_of = as_of or date.today()
-	positions = await crud.get_positions(session, user_id)
-	cash = await crud.get_cash_balance(session, user_id)
+@app.get("/api/cashflow", response_model=List[schemas.CashflowPoint], tags=["Analytics"], summary="Cashflow")
+async def cashflow(user_id: int, session: AsyncSession = Depends(get_session)):
+	return await _compute_cashflow(session, user_id)
+
+
+async def _compute_allocation(session: AsyncSession, user_id: int, as_of: date) -> list[dict]:
+	positions, cash = await crud.get_user_state(session, user_id)
 	symbols = list(positions.keys())
 	prices = await get_last_prices(symbols, as_of) if symbols else {}
 	parts: list[dict] = []
@@ -137,18 +144,44 @@ async def allocation(user_id: int, as_of: date | None = None, session: AsyncSess
 	return parts
 
 
+@app.get("/api/allocation", response_model=List[schemas.AllocationSlice], tags=["Analytics"], summary="Allocation")
+async def allocation(user_id: int, as_of: date | None = None, session: AsyncSession = Depends(get_session)):
+	return await _compute_allocation(session, user_id, as_of or date.today())
+
+
+def _networth_points(pv: list[dict]) -> list[dict]:
+	return [{"date": p["date"], "net_worth": p["value"]} for p in pv]
+
+
 @app.get("/api/networth", response_model=List[schemas.NetWorthPoint], tags=["Analytics"], summary="Networth")
 async def networth(user_id: int, as_of: date | None = None, session: AsyncSession = Depends(get_session)):
+	pv = await _compute_portfolio_value(session, user_id, as_of or date.today())
+	return _networth_points(pv)
+
+
+@app.get("/api/dashboard", response_model=schemas.DashboardData, tags=["Analytics"], summary="Dashboard")
+async def dashboard(user_id: int, as_of: date | None = None):
+	"""Composite payload for the Dash frontend: one request per refresh."""
 	as_of = as_of or date.today()
-	pv = await portfolio_value(user_id=user_id, as_of=as_of, session=session)
-	return [{"date": p["date"], "net_worth": p["value"]} for p in pv]
+
+	async def _with_session(fn, *args):
+		# Each branch gets its own session; AsyncSession is not
+		# safe to share across concurrent tasks.
+		async with AsyncSessionLocal() as s:
+			return await fn(s, *args)
+
+	cashflow_pts, alloc, pv = await asyncio.gather(
+		_with_session(_compute_cashflow, user_id),
+		_with_session(_compute_allocation, user_id, as_of),
+		_with_session(_compute_portfolio_value, user_id, as_of),
+	)
+	return {"cashflow": cashflow_pts, "allocation": alloc, "networth": _networth_points(pv)}
 
 
 @app.post("/api/montecarlo", response_model=schemas.MonteCarloResult, tags=["Analytics"], summary="Monte Carlo")
 async def monte_carlo(params: schemas.MonteCarloParams, session: AsyncSession = Depends(get_session)):
 	as_of = date.today()
-	positions = await crud.get_positions(session, params.user_id)
-	cash = await crud.get_cash_balance(session, params.user_id)
+	positions, cash = await crud.get_user_state(session, params.user_id)
 	total = float(cash)
 	if positions:
 		last_prices = await get_last_prices(list(positions.keys()), as_of)
@@ -162,19 +195,16 @@ async def monte_carlo(params: schemas.MonteCarloParams, session: AsyncSession =
 	dt = 1.0 / 12.0
 	means = (mu - 0.5 * sigma * sigma) * dt
 	stds = sigma * math.sqrt(dt)
-	def simulate_path() -> list[float]:
-		value = initial
-		vals = [value]
-		for _ in range(n):
-			shock = random.gauss(means, stds)
-			value = value * math.exp(shock)
-			vals.append(value)
-		return vals
-	all_vals = [simulate_path() for _ in range(sims)]
-	median = [float(sorted(col)[len(col)//2]) for col in zip(*all_vals)]
-	p10 = [float(sorted(col)[max(0, int(0.10 * (len(col)-1)))]) for col in zip(*all_vals)]
-	p90 = [float(sorted(col)[int(0.90 * (len(col)-1))]) for col in zip(*all_vals)]
-	return {"median": median, "p10": p10, "p90": p90}
+	if sims <= 0:
+		return {"median": [], "p10": [], "p90": []}
+	n = max(n, 0)
+	# Draw all shocks at once and cumulate log-returns along each path.
+	rng = np.random.default_rng()
+	shocks = rng.standard_normal((sims, n)) * stds + means
+	paths = initial * np.exp(np.cumsum(shocks, axis=1))
+	paths_full = np.hstack([np.full((sims, 1), initial), paths])
+	p10, median, p90 = np.percentile(paths_full, [10, 50, 90], axis=0)
+	return {"median": median.tolist(), "p10": p10.tolist(), "p90": p90.tolist()}
 
 
 # Demo seed
@@ -184,30 +214,14 @@ async def seed_demo(session: AsyncSession = Depends(get_session)):
 	user = await crud.create_user(session, name=f"Demo {uid}", email=f"demo{uid}@example.com")
 	user_id = user.id
 	start = date.today().replace(day=1) - timedelta(days=150)
+	rows: list[dict] = []
 	for i in range(6):
 		month_date = (start + timedelta(days=30*i)).replace(day=5)
-		await crud.create_transaction(session,
-			user_id=user_id,
-			date_=month_date,
-			type_="income",
-			category="salary",
-			amount=5000.0,
-			asset_symbol=None,
-			shares=None,
-			price_at_trade=None,
-		)
-		await crud.create_transaction(session,
-			user_id=user_id,
-			date_=month_date.replace(day=10),
-			type_="expense",
-			category="rent",
-			amount=2000.0,
-			asset_symbol=None,
-			shares=None,
-			price_at_trade=None,
-		)
-	await crud.create_transaction(session, user_id=user_id, date_=date.today() - timedelta(days=120), type_="trade", category="buy", amount=1500.0, asset_symbol="AAPL", shares=10, price_at_trade=150.0)
-	await crud.create_transaction(session, user_id=user_id, date_=date.today() - timedelta(days=90), type_="trade", category="buy", amount=2000.0, asset_symbol="MSFT", shares=5, price_at_trade=400.0)
+		rows.append({"user_id": user_id, "date": month_date, "type": "income", "category": "salary", "amount": 5000.0})
+		rows.append({"user_id": user_id, "date": month_date.replace(day=10), "type": "expense", "category": "rent", "amount": 2000.0})
+	rows.append({"user_id": user_id, "date": date.today() - timedelta(days=120), "type": "trade", "category": "buy", "amount": 1500.0, "asset_symbol": "AAPL", "shares": 10, "price_at_trade": 150.0})
+	rows.append({"user_id": user_id, "date": date.today() - timedelta(days=90), "type": "trade", "category": "buy", "amount": 2000.0, "asset_symbol": "MSFT", "shares": 5, "price_at_trade": 400.0})
+	await crud.create_transactions_bulk(session, rows)
 	return {"user_id": user_id}
 
 
@@ -1,97 +1,135 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import Dict, List
 
+import asyncio
 import io
-import math
-import random
+import time
 
 import httpx
+import numpy as np
+import pandas as pd
+
+from .utils import date_range
 
 USER_AGENT = {"User-Agent": "fullstack-dashboard/1.0"}
 
+# Shared HTTP client so keep-alive connections and DNS lookups are reused
+# across symbols and requests; opened eagerly in the app lifespan.
+_CLIENT: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+	global _CLIENT
+	if _CLIENT is None:
+		_CLIENT = httpx.AsyncClient(
+			headers=USER_AGENT,
+			timeout=10,
+			limits=httpx.Limits(max_keepalive_connections=20),
+		)
+	return _CLIENT
+
+
+async def close_http_client() -> None:
+	global _CLIENT
+	if _CLIENT is not None:
+		await _CLIENT.aclose()
+		_CLIENT = None
+
+# Cache fetched histories per symbol so back-to-back analytics calls skip
+# the network entirely; per-symbol locks collapse concurrent fetches.
+STOOQ_CACHE_TTL = 3600.0
+_STOOQ_CACHE: Dict[str, tuple[float, List[dict]]] = {}
+_STOOQ_LOCKS: Dict[str, asyncio.Lock] = {}
+
 
 async def fetch_stooq_history(symbol: str) -> List[dict]:
 	"""Fetch daily history from Stooq (no key). Returns list of {date, close}."""
+	cached = _STOOQ_CACHE.get(symbol)
+	if cached is not None and time.time() - cached[0] < STOOQ_CACHE_TTL:
+		return cached[1]
+	lock = _STOOQ_LOCKS.setdefault(symbol, asyncio.Lock())
+	async with lock:
+		cached = _STOOQ_CACHE.get(symbol)
+		if cached is not None and time.time() - cached[0] < STOOQ_CACHE_TTL:
+			return cached[1]
+		out = await _fetch_stooq_history(symbol)
+		if out:
+			_STOOQ_CACHE[symbol] = (time.time(), out)
+		return out
+
+
+async def _fetch_stooq_history(symbol: str) -> List[dict]:
 	candidates = [symbol.lower(), f"{symbol.lower()}.us"]
-	async with httpx.AsyncClient(headers=USER_AGENT, timeout=10) as client:
-		for cand in candidates:
-			url = f"https://stooq.com/q/d/l/?s={cand}&i=d"
-			resp = await client.get(url)
-			text = resp.text or ""
-			if resp.status_code == 200 and "Date,Open,High,Low,Close,Volume" in text:
-				lines = text.strip().splitlines()
-				if len(lines) <= 1:
-					continue
-				out: List[dict] = []
-				for line in lines[1:]:
-					parts = line.split(",")
-					if len(parts) < 5:
-						continue
-					try:
-						d = datetime.strptime(parts[0], "%Y-%m-%d").date()
-						close = float(parts[4])
-						out.append({"date": d, "close": close})
-					except Exception:
-						continue
-				if out:
-					out.sort(key=lambda r: r["date"])  
-					return out
+	client = get_http_client()
+	for cand in candidates:
+		url = f"https://stooq.com/q/d/l/?s={cand}&i=d"
+		resp = await client.get(url)
+		text = resp.text or ""
+		if resp.status_code == 200 and "Date,Open,High,Low,Close,Volume" in text:
+			try:
+				df = pd.read_csv(io.StringIO(text), usecols=["Date", "Close"])
+			except Exception:
+				continue
+			# Coerce malformed rows to NaN so dropna skips them instead of
+			# one bad value failing the whole history.
+			df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+			df["Close"] = pd.to_numeric(df["Close"], errors="coerce")
+			df = df.dropna(subset=["Date", "Close"]).sort_values("Date")
+			if df.empty:
+				continue
+			return [
+				{"date": ts.date(), "close": float(close)}
+				for ts, close in zip(df["Date"], df["Close"])
+			]
 	# Return empty on failure
 	return []
 
 
-def daterange(start: date, end: date) -> List[date]:
-	res: List[date] = []
-	cur = start
-	while cur <= end:
-		res.append(cur)
-		cur = cur + timedelta(days=1)
-	return res
-
-
 def simulate_gbm(start: date, end: date, start_price: float = 100.0,
 				 mu: float = 0.07, sigma: float = 0.2) -> List[dict]:
 	"""Simulate daily GBM prices as fallback; returns list of {date, close}."""
-	dates = daterange(start, end)
+	dates = date_range(start, end)
 	if not dates:
 		return []
 	dt = 1.0 / 252.0
-	price = start_price
-	series: List[dict] = []
-	for i, d in enumerate(dates):
-		if i == 0:
-			series.append({"date": d, "close": price})
-			continue
-		shock = random.gauss((mu - 0.5 * sigma * sigma) * dt, sigma * math.sqrt(dt))
-		price = price * math.exp(shock)
-		series.append({"date": d, "close": price})
+	rng = np.random.default_rng()
+	shocks = rng.normal((mu - 0.5 * sigma * sigma) * dt, sigma * np.sqrt(dt), len(dates) - 1)
+	prices = start_price * np.exp(np.concatenate(([0.0], np.cumsum(shocks))))
+	return [{"date": d, "close": float(p)} for d, p in zip(dates, prices)]
+
+
+async def _fetch_one(sym: str, start: date, end: date) -> List[dict]:
+	try:
+		series = await fetch_stooq_history(sym)
+		series = [row for row in series if start <= row["date"] <= end]
+		if not series:
+			series = simulate_gbm(start, end)
+	except Exception:
+		series = simulate_gbm(start, end)
 	return series
 
 
 async def get_price_history(symbols: List[str], start: date, end: date) -> Dict[str, List[dict]]:
 	"""Get price history for symbols between start and end; use fallback simulation if API fails."""
-	results: Dict[str, List[dict]] = {}
-	for sym in symbols:
-		try:
-			series = await fetch_stooq_history(sym)
-			series = [row for row in series if start <= row["date"] <= end]
-			if not series:
-				series = simulate_gbm(start, end)
-		except Exception:
-			series = simulate_gbm(start, end)
-		results[sym] = series
-	return results
+	series_list = await asyncio.gather(*(_fetch_one(sym, start, end) for sym in symbols))
+	return dict(zip(symbols, series_list))
 
 
 async def get_last_prices(symbols: List[str], as_of: date) -> Dict[str, float]:
-	start = as_of - timedelta(days=365)
-	hist = await get_price_history(symbols, start, as_of)
-	last: Dict[str, float] = {}
-	for sym, series in hist.items():
-		if series:
-			last[sym] = float(series[-1]["close"]) 
-		else:
-			last[sym] = 0.0
-	return last
+	"""Last close at or before as_of per symbol, reading only the history tail."""
+	async def _last(sym: str) -> float:
+		try:
+			series = await fetch_stooq_history(sym)
+		except Exception:
+			series = []
+		if not series:
+			series = simulate_gbm(as_of - timedelta(days=365), as_of)
+		# Histories are sorted ascending, so this stops after a few rows.
+		for row in reversed(series):
+			if row["date"] <= as_of:
+				return float(row["close"])
+		return 0.0
+	closes = await asyncio.gather(*(_last(sym) for sym in symbols))
+	return dict(zip(symbols, closes))
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -24,6 +24,12 @@ class User(Base):
 
 class Transaction(Base):
 	__tablename__ = "transactions"
+	__table_args__ = (
+		# Covering indexes for the cash-balance/cashflow aggregates and
+		# the per-symbol position sums.
+		Index("ix_txn_user_type_date", "user_id", "type", "date"),
+		Index("ix_txn_user_symbol", "user_id", "asset_symbol"),
+	)
 
 	id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 	user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
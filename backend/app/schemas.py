@@ -77,6 +77,12 @@ class NetWorthPoint(BaseModel):
 	net_worth: float
 
 
+class DashboardData(BaseModel):
+	cashflow: list[CashflowPoint]
+	allocation: list[AllocationSlice]
+	networth: list[NetWorthPoint]
+
+
 class MonteCarloParams(BaseModel):
 	user_id: int
 	initial_value: Optional[float] = None
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import List
+
+import numpy as np
+
+
+def date_range(start: date, end: date) -> List[date]:
+	"""Inclusive daily date range built with a single np.arange."""
+	if start > end:
+		return []
+	days = np.arange(np.datetime64(start), np.datetime64(end) + np.timedelta64(1, "D"), dtype="datetime64[D]")
+	# datetime64[D].tolist() yields Python date objects for the JSON boundary.
+	return days.tolist()
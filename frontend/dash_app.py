@@ -4,6 +4,7 @@ import os
 from datetime import date
 
 import requests
+from requests.adapters import HTTPAdapter
 
 import dash
 from dash import Dash, dcc, html, Input, Output, State
@@ -12,6 +13,13 @@ import dash_bootstrap_components as dbc
 
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://127.0.0.1:8000")
 
+# Persistent session so backend calls reuse keep-alive connections
+# instead of paying a TCP handshake per fetch.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 external_stylesheets = [dbc.themes.MINTY]
 app: Dash = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_callback_exceptions=True)
 app.title = "Finance Dashboard"
@@ -70,6 +78,7 @@ app.layout = dbc.Container([
 	navbar(),
 	controls,
 	build_tabs(),
+	dcc.Store(id="dashboard-store"),
 	dbc.Alert(id="error", color="danger", is_open=False, dismissable=True, class_name="mt-2"),
 	toasts,
 	dbc.Card(dbc.CardBody([
@@ -80,7 +89,7 @@ app.layout = dbc.Container([
 
 def _fetch_json(method: str, path: str, **kwargs):
 	url = f"{BACKEND_URL}{path}"
-	resp = requests.request(method, url, timeout=30, **kwargs)
+	resp = SESSION.request(method, url, timeout=30, **kwargs)
 	resp.raise_for_status()
 	return resp.json()
 
@@ -95,13 +104,26 @@ def seed_demo(n):
 		return dash.no_update, True, f"Seed failed: {e}"
 
 
-@app.callback(Output("content", "children"), Output("error", "is_open"), Output("error", "children"), [Input("tabs", "active_tab"), Input("user-id", "value"), Input("refresh", "n_clicks")])
-def render_content(tab: str, user_id: int, _n):
+@app.callback(Output("dashboard-store", "data"), [Input("user-id", "value"), Input("refresh", "n_clicks")])
+def load_dashboard(user_id: int, _n):
+	"""Fetch the composite dashboard payload once per user/refresh; tabs read the store."""
 	if not user_id:
+		return None
+	try:
+		return _fetch_json("GET", "/api/dashboard", params={"user_id": user_id})
+	except Exception as e:
+		return {"error": str(e)}
+
+
+@app.callback(Output("content", "children"), Output("error", "is_open"), Output("error", "children"), [Input("tabs", "active_tab"), Input("dashboard-store", "data")], State("user-id", "value"))
+def render_content(tab: str, data, user_id: int):
+	if not user_id or data is None:
 		return html.Div(dbc.Alert("No user selected. Click Seed Demo Data to create one.", color="warning")), False, ""
+	if isinstance(data, dict) and data.get("error"):
+		return html.Div(), True, f"Error: {data['error']}"
 	try:
 		if tab == "networth":
-			points = _fetch_json("GET", "/api/networth", params={"user_id": user_id})
+			points = data.get("networth", [])
 			fig = go.Figure()
 			if points:
 				fig.add_trace(go.Scatter(x=[p["date"] for p in points], y=[p["net_worth"] for p in points], mode="lines", name="Net Worth", line=dict(color="#00b894", width=3)))
@@ -109,7 +131,7 @@ def render_content(tab: str, user_id: int, _n):
 				return dcc.Graph(figure=fig), False, ""
 			return html.Div(dbc.Alert("No data yet. Add transactions or seed demo.", color="secondary")), False, ""
 		elif tab == "cashflow":
-			points = _fetch_json("GET", "/api/cashflow", params={"user_id": user_id})
+			points = data.get("cashflow", [])
 			fig = go.Figure()
 			if points:
 				x = [p["date"] for p in points]
@@ -120,7 +142,7 @@ def render_content(tab: str, user_id: int, _n):
 				return dcc.Graph(figure=fig), False, ""
 			return html.Div(dbc.Alert("No data yet. Add income/expenses or seed demo.", color="secondary")), False, ""
 		elif tab == "allocation":
-			slices = _fetch_json("GET", "/api/allocation", params={"user_id": user_id})
+			slices = data.get("allocation", [])
 			fig = go.Figure()
 			if slices:
 				fig.add_trace(go.Pie(labels=[s["label"] for s in slices], values=[s["value"] for s in slices], hole=0.3))